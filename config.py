@@ -17,3 +17,12 @@ NOTIFICATION_CHANNEL = '@shadowsquad0'
 
 # Default owner IDs (replace with actual Telegram user IDs)
 DEFAULT_OWNERS = [7436974867, 7218606355, 5933410316, 5822279535]
+
+# Background re-verification sweep of verified users
+SWEEP_INTERVAL = 300              # seconds between sweep runs
+SWEEP_BATCH_SIZE = 200            # verified users fetched per keyset page
+SWEEP_CONCURRENCY = 5             # users checked in parallel
+SWEEP_MAX_CALLS_PER_SECOND = 10   # global Bot API budget for the sweep
+# A run stops after this many API calls, leaving headroom to finish before the next tick
+SWEEP_MAX_CALLS_PER_RUN = int(SWEEP_INTERVAL * SWEEP_MAX_CALLS_PER_SECOND * 0.8)
+SWEEP_ACTIVE_DAYS = 7             # users active within this window are checked first
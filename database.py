@@ -4,6 +4,7 @@ import datetime
 import logging
 
 DB_NAME = 'bot.db'
+LAST_ACTIVE_RESOLUTION = datetime.timedelta(hours=1)
 logger = logging.getLogger(__name__)
 
 def init_db():
@@ -19,9 +20,18 @@ def init_db():
         points INTEGER DEFAULT 0,
         verified INTEGER DEFAULT 0,
         referrals INTEGER DEFAULT 0,
-        banned INTEGER DEFAULT 0
+        banned INTEGER DEFAULT 0,
+        last_active TEXT,
+        verified_at TEXT
     )
     ''')
+    c.execute("PRAGMA table_info(users)")
+    columns = [col[1] for col in c.fetchall()]
+    for column in ('last_active', 'verified_at'):
+        if column not in columns:
+            c.execute(f"ALTER TABLE users ADD COLUMN {column} TEXT")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_users_verified ON users (verified, user_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_users_verified_active ON users (verified, last_active, user_id)")
     c.execute('''
     CREATE TABLE IF NOT EXISTS platforms (
         platform_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -76,6 +86,20 @@ def init_db():
         role TEXT
     )
     ''')
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS sweep_state (
+        name TEXT PRIMARY KEY,
+        phase TEXT,
+        last_user_id INTEGER,
+        cutoff TEXT,
+        updated_at TEXT
+    )
+    ''')
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS sweep_active_users (
+        user_id INTEGER PRIMARY KEY
+    )
+    ''')
     conn.commit()
     conn.close()
 
@@ -85,9 +109,11 @@ def add_user(user_id, username):
     join_date = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     try:
         c.execute(
-            "INSERT OR IGNORE INTO users (user_id, username, role, join_date, language, points, verified, referrals, banned) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            (user_id, username, 'user', join_date, 'en', 0, 0, 0, 0)
+            "INSERT OR IGNORE INTO users (user_id, username, role, join_date, language, points, verified, referrals, banned, last_active) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (user_id, username, 'user', join_date, 'en', 0, 0, 0, 0, join_date)
         )
+        if c.rowcount == 0:
+            _touch_last_active(c, user_id)
     except Exception as e:
         logger.error(f"Error adding user {user_id}: {e}")
     conn.commit()
@@ -96,7 +122,8 @@ def add_user(user_id, username):
 def mark_user_verified(user_id):
     conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
-    c.execute("UPDATE users SET verified = 1 WHERE user_id = ?", (user_id,))
+    verified_at = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    c.execute("UPDATE users SET verified = 1, verified_at = ? WHERE user_id = ?", (verified_at, user_id))
     conn.commit()
     conn.close()
 
@@ -107,6 +134,23 @@ def update_user_language(user_id, language):
     conn.commit()
     conn.close()
 
+def _touch_last_active(c, user_id):
+    # Only write when the stored value is older than LAST_ACTIVE_RESOLUTION,
+    # so frequent interactions don't turn into a disk write each.
+    now = datetime.datetime.now()
+    c.execute(
+        "UPDATE users SET last_active = ? WHERE user_id = ? AND (last_active IS NULL OR last_active < ?)",
+        (now.strftime('%Y-%m-%d %H:%M:%S'), user_id,
+         (now - LAST_ACTIVE_RESOLUTION).strftime('%Y-%m-%d %H:%M:%S'))
+    )
+
+def update_last_active(user_id):
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    _touch_last_active(c, user_id)
+    conn.commit()
+    conn.close()
+
 def get_user(user_id):
     conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
@@ -191,4 +235,90 @@ def generate_key(key_type="normal", quantity=1):
         conn.close()
         keys.append(key)
     return keys
-    
+
+def get_sweep_checkpoint(name='reverify'):
+    """Returns (phase, last_user_id, cutoff) for a sweep, or a fresh cycle if none is saved."""
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute("SELECT phase, last_user_id, cutoff FROM sweep_state WHERE name = ?", (name,))
+    row = c.fetchone()
+    conn.close()
+    if row is None:
+        return 'active', 0, None
+    return row
+
+def start_sweep_cycle(cutoff, name='reverify'):
+    """Snapshots the users active since cutoff and resets the checkpoint for a new cycle.
+
+    The snapshot fixes which users belong to the active phase for the whole cycle, so
+    users who become active mid-cycle are still picked up by the idle phase.
+    """
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    c.execute("DELETE FROM sweep_active_users")
+    c.execute(
+        "INSERT INTO sweep_active_users (user_id) SELECT user_id FROM users "
+        "WHERE verified = 1 AND last_active >= ? AND user_id NOT IN (SELECT user_id FROM admins)",
+        (cutoff,)
+    )
+    c.execute(
+        "INSERT OR REPLACE INTO sweep_state (name, phase, last_user_id, cutoff, updated_at) VALUES (?, ?, ?, ?, ?)",
+        (name, 'active', 0, cutoff, timestamp)
+    )
+    conn.commit()
+    conn.close()
+
+def get_verified_users_batch(phase, after_user_id, limit):
+    """Keyset page of verified, non-admin user IDs after after_user_id.
+
+    The 'active' phase pages through this cycle's snapshot of active users, the
+    'idle' phase through every other verified user. Both are ordered by user_id.
+    """
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    if phase == 'active':
+        c.execute(
+            "SELECT a.user_id FROM sweep_active_users a JOIN users u ON u.user_id = a.user_id "
+            "WHERE a.user_id > ? AND u.verified = 1 ORDER BY a.user_id LIMIT ?",
+            (after_user_id, limit)
+        )
+    else:
+        c.execute(
+            "SELECT user_id FROM users WHERE verified = 1 AND user_id > ? "
+            "AND user_id NOT IN (SELECT user_id FROM admins) "
+            "AND user_id NOT IN (SELECT user_id FROM sweep_active_users) ORDER BY user_id LIMIT ?",
+            (after_user_id, limit)
+        )
+    user_ids = [row[0] for row in c.fetchall()]
+    conn.close()
+    return user_ids
+
+def apply_sweep_batch(unverified_ids, phase, last_user_id, cutoff, checked_at=None, name='reverify'):
+    """Revokes verification for a batch of users and saves the sweep checkpoint in one transaction.
+
+    Returns the number of users revoked. Users who verified again at or after
+    checked_at (default: now) keep their status, since the sweep's result for them is stale.
+    """
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    checked_at = checked_at or timestamp
+    revoked = 0
+    for user_id in unverified_ids:
+        c.execute(
+            "UPDATE users SET verified = 0 WHERE user_id = ? AND verified = 1 "
+            "AND (verified_at IS NULL OR verified_at < ?)",
+            (user_id, checked_at)
+        )
+        if c.rowcount:
+            revoked += 1
+            c.execute("INSERT INTO user_logs (user_id, action, timestamp) VALUES (?, ?, ?)",
+                      (user_id, "Verification revoked: left a required channel", timestamp))
+    c.execute(
+        "INSERT OR REPLACE INTO sweep_state (name, phase, last_user_id, cutoff, updated_at) VALUES (?, ?, ?, ?, ?)",
+        (name, phase, last_user_id, cutoff, timestamp)
+    )
+    conn.commit()
+    conn.close()
+    return revoked
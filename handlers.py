@@ -7,7 +7,7 @@ from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import CallbackContext
 from config import REQUIRED_CHANNELS
 from database import (
-    add_user, mark_user_verified, get_user, add_user_log,
+    add_user, mark_user_verified, get_user, add_user_log, update_last_active,
     is_admin, is_owner, generate_key, ban_user, unban_user, add_admin
 )
 
@@ -264,6 +264,7 @@ async def admin_users_callback(update: Update, context: ContextTypes.DEFAULT_TYP
 async def callback_query_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     data = query.data
+    update_last_active(query.from_user.id)
     if data == "verify":
         await verify_callback(update, context)
     elif data == "change_lang":
@@ -280,6 +281,7 @@ async def callback_query_handler(update: Update, context: ContextTypes.DEFAULT_T
 @error_handler
 async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
+    update_last_active(user_id)
     if context.user_data.get('awaiting_review'):
         review_text = update.message.text
         add_user_log(user_id, f"Review: {review_text}")
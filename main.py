@@ -3,12 +3,13 @@ import logging
 import asyncio
 import nest_asyncio
 from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandler, MessageHandler, filters
-from config import TOKEN, NOTIFICATION_CHANNEL, DEFAULT_OWNERS
+from config import TOKEN, NOTIFICATION_CHANNEL, DEFAULT_OWNERS, SWEEP_INTERVAL
 from database import init_db, add_admin
 from handlers import (
     start, callback_query_handler, message_handler, claim_key_command,
     ban_command, unban_command, add_owner_command
 )
+from sweeper import reverify_sweep
 
 # Patch the event loop (useful in Termux)
 nest_asyncio.apply()
@@ -129,6 +130,7 @@ async def main():
     # 5. Schedule notifications using the job queue
     job_queue = application.job_queue
     job_queue.run_repeating(scheduled_notification, interval=3600, first=10)
+    job_queue.run_repeating(reverify_sweep, interval=SWEEP_INTERVAL, first=60)
 
     # 6. Run the bot using run_polling()
     await application.run_polling()
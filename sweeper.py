@@ -0,0 +1,155 @@
+# sweeper.py
+import asyncio
+import datetime
+import logging
+import time
+from telegram.error import RetryAfter
+from telegram.ext import ContextTypes
+from config import (
+    REQUIRED_CHANNELS, SWEEP_BATCH_SIZE, SWEEP_CONCURRENCY,
+    SWEEP_MAX_CALLS_PER_SECOND, SWEEP_MAX_CALLS_PER_RUN, SWEEP_ACTIVE_DAYS
+)
+from database import (
+    get_sweep_checkpoint, start_sweep_cycle, get_verified_users_batch, apply_sweep_batch
+)
+
+logger = logging.getLogger(__name__)
+MEMBER_STATUSES = ['member', 'administrator', 'creator']
+# A batch with at least this many failed checks, making up most of it, is treated as an outage
+OUTAGE_MIN_FAILURES = 5
+
+
+class ApiBudget:
+    """Spaces out Bot API calls so the sweep stays under a fixed rate."""
+
+    def __init__(self, calls_per_second):
+        self.interval = 1.0 / calls_per_second
+        self.next_slot = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            now = time.monotonic()
+            wait = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds):
+        if isinstance(seconds, datetime.timedelta):
+            seconds = seconds.total_seconds()
+        self.next_slot = max(self.next_slot, time.monotonic() + seconds)
+
+
+async def check_membership(bot, user_id, budget, semaphore):
+    """Returns (is_member, calls_made, error).
+
+    is_member is True if the user is in every required channel, False if they
+    have left one, and None if the check could not be completed, in which case
+    error holds the exception that stopped it.
+    """
+    calls = 0
+    async with semaphore:
+        for channel in REQUIRED_CHANNELS:
+            await budget.acquire()
+            calls += 1
+            try:
+                member_status = (await bot.get_chat_member(chat_id=channel, user_id=user_id)).status
+            except RetryAfter as e:
+                budget.pause(e.retry_after)
+                return None, calls, e
+            except Exception as e:
+                return None, calls, e
+            if member_status not in MEMBER_STATUSES:
+                return False, calls, None
+    return True, calls, None
+
+
+async def reverify_sweep(context: ContextTypes.DEFAULT_TYPE):
+    """Re-checks channel membership of verified users, a few batches per run.
+
+    Each cycle walks a snapshot of recently active users first, then every other
+    verified user. The position is checkpointed after every batch so a restart
+    resumes where it left off.
+    Database work runs in a worker thread so it never stalls the handlers.
+    """
+    if not REQUIRED_CHANNELS:
+        # Nothing to be a member of, so every verified user stays verified.
+        return
+    budget = context.bot_data.get('sweep_budget')
+    if budget is None:
+        budget = context.bot_data['sweep_budget'] = ApiBudget(SWEEP_MAX_CALLS_PER_SECOND)
+    semaphore = asyncio.Semaphore(SWEEP_CONCURRENCY)
+    phase, last_user_id, cutoff = await asyncio.to_thread(get_sweep_checkpoint)
+    calls = 0
+    revoked = 0
+    while True:
+        # Each user costs at most one call per channel, so size the page to the calls left.
+        limit = min(SWEEP_BATCH_SIZE, (SWEEP_MAX_CALLS_PER_RUN - calls) // len(REQUIRED_CHANNELS))
+        if limit <= 0:
+            break
+        if cutoff is None:
+            cutoff = (datetime.datetime.now() - datetime.timedelta(days=SWEEP_ACTIVE_DAYS)).strftime('%Y-%m-%d %H:%M:%S')
+            await asyncio.to_thread(start_sweep_cycle, cutoff)
+            phase, last_user_id = 'active', 0
+        user_ids = await asyncio.to_thread(get_verified_users_batch, phase, last_user_id, limit)
+        if not user_ids:
+            if phase == 'active':
+                phase, last_user_id = 'idle', 0
+                await asyncio.to_thread(apply_sweep_batch, [], phase, last_user_id, cutoff)
+                continue
+            # Cycle finished; the next one starts on the following run.
+            await asyncio.to_thread(apply_sweep_batch, [], 'active', 0, None)
+            logger.info("Verification sweep cycle complete")
+            break
+        checked_at = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        results = await asyncio.gather(
+            *(check_membership(context.bot, user_id, budget, semaphore) for user_id in user_ids)
+        )
+        calls += sum(made for _, made, _ in results)
+        statuses = [is_member for is_member, _, _ in results]
+        errors = [error for _, _, error in results]
+        # A flood wait hits every user alike, so those checks are retried once the
+        # budget's pause is over, as far as the cap allows. Other errors wait for the next run.
+        flooded = [i for i, error in enumerate(errors) if isinstance(error, RetryAfter)]
+        flooded = flooded[:(SWEEP_MAX_CALLS_PER_RUN - calls) // len(REQUIRED_CHANNELS)]
+        if flooded:
+            retried = await asyncio.gather(
+                *(check_membership(context.bot, user_ids[i], budget, semaphore) for i in flooded)
+            )
+            calls += sum(made for _, made, _ in retried)
+            for i, (is_member, _, error) in zip(flooded, retried):
+                statuses[i], errors[i] = is_member, error
+        unverified = [user_id for user_id, is_member in zip(user_ids, statuses) if is_member is False]
+        unknown = [i for i, is_member in enumerate(statuses) if is_member is None]
+        if unknown:
+            logger.warning(f"Sweep could not check {len(unknown)} of {len(user_ids)} users, "
+                           f"first error: {errors[unknown[0]]!r}")
+        if len(unknown) >= OUTAGE_MIN_FAILURES and len(unknown) * 2 > len(user_ids):
+            # Most of the batch failing points at an outage or a channel the bot lost
+            # access to, not at these users, so the run stops with the checkpoint in place.
+            revoked += await asyncio.to_thread(
+                apply_sweep_batch, unverified, phase, last_user_id, cutoff, checked_at
+            )
+            logger.error("Verification sweep stopped: most membership checks in the batch failed")
+            break
+        # The checkpoint only advances past users that were actually checked, so a
+        # gap is retried by the next run. A user that fails again when the next run
+        # starts at it is passed over so one broken account can't stall the sweep.
+        checked = len(user_ids)
+        for i in unknown:
+            if i == 0 and context.bot_data.get('sweep_gap_user') == user_ids[0] \
+                    and not isinstance(errors[0], RetryAfter):
+                logger.warning(f"Sweep skipping {user_ids[0]} this cycle: {errors[0]!r}")
+                continue
+            checked = i
+            break
+        context.bot_data['sweep_gap_user'] = user_ids[checked] if checked < len(user_ids) else None
+        if checked:
+            last_user_id = user_ids[checked - 1]
+        revoked += await asyncio.to_thread(
+            apply_sweep_batch, unverified, phase, last_user_id, cutoff, checked_at
+        )
+        if checked < len(user_ids):
+            break
+    logger.info(f"Verification sweep run: {calls} API calls, {revoked} users unverified")
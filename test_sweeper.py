@@ -0,0 +1,199 @@
+# test_sweeper.py
+import asyncio
+import datetime
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+from telegram.error import RetryAfter
+
+import database
+import sweeper
+
+CHANNELS = ['@one', '@two']
+
+
+class FakeBot:
+    """Answers get_chat_member from a {user_id: status} map and records each call."""
+
+    def __init__(self, statuses, errors=None):
+        self.statuses = statuses
+        self.errors = errors or {}
+        self.calls = []
+
+    async def get_chat_member(self, chat_id, user_id):
+        self.calls.append((chat_id, user_id))
+        error = self.errors.get(user_id)
+        if isinstance(error, list):
+            error = error.pop(0) if error else None
+        if error is not None:
+            raise error
+        return SimpleNamespace(status=self.statuses.get(user_id, 'member'))
+
+    def checked_users(self):
+        return [user_id for chat_id, user_id in self.calls if chat_id == CHANNELS[0]]
+
+
+@pytest.fixture(autouse=True)
+def sweep_env(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DB_NAME', str(tmp_path / 'bot.db'))
+    monkeypatch.setattr(sweeper, 'REQUIRED_CHANNELS', CHANNELS)
+    monkeypatch.setattr(sweeper, 'SWEEP_MAX_CALLS_PER_SECOND', 10000)
+    monkeypatch.setattr(sweeper, 'SWEEP_MAX_CALLS_PER_RUN', 1000)
+    monkeypatch.setattr(sweeper, 'SWEEP_BATCH_SIZE', 10)
+    database.init_db()
+
+
+def add_verified_user(user_id, active=False):
+    database.add_user(user_id, f"user{user_id}")
+    database.mark_user_verified(user_id)
+    last_active = datetime.datetime.now() if active else datetime.datetime(2000, 1, 1)
+    conn = sqlite3.connect(database.DB_NAME)
+    conn.execute("UPDATE users SET last_active = ?, verified_at = ? WHERE user_id = ?",
+                 (last_active.strftime('%Y-%m-%d %H:%M:%S'), '2000-01-01 00:00:00', user_id))
+    conn.commit()
+    conn.close()
+
+
+def is_verified(user_id):
+    return database.get_user(user_id)[6] == 1
+
+
+def run_sweep(bot, bot_data=None):
+    # A fresh bot_data per run mimics a restart of the bot process.
+    context = SimpleNamespace(bot=bot, bot_data={} if bot_data is None else bot_data)
+    asyncio.run(sweeper.reverify_sweep(context))
+
+
+def test_active_users_are_checked_before_idle_users():
+    for user_id in (1, 2, 3, 4):
+        add_verified_user(user_id, active=user_id in (2, 4))
+    bot = FakeBot({})
+    run_sweep(bot)
+    checked = bot.checked_users()
+    assert sorted(checked[:2]) == [2, 4]
+    assert sorted(checked[2:]) == [1, 3]
+    assert database.get_sweep_checkpoint() == ('active', 0, None)
+
+
+def test_sweep_revokes_users_who_left_a_channel():
+    for user_id in (1, 2):
+        add_verified_user(user_id)
+    run_sweep(FakeBot({2: 'left'}))
+    assert is_verified(1)
+    assert not is_verified(2)
+
+
+def test_sweep_resumes_from_checkpoint_after_restart(monkeypatch):
+    for user_id in (1, 2, 3, 4):
+        add_verified_user(user_id)
+    monkeypatch.setattr(sweeper, 'SWEEP_MAX_CALLS_PER_RUN', 2 * len(CHANNELS))
+    first = FakeBot({})
+    run_sweep(first)
+    assert sorted(first.checked_users()) == [1, 2]
+    assert database.get_sweep_checkpoint()[:2] == ('idle', 2)
+    second = FakeBot({})
+    run_sweep(second)
+    assert sorted(second.checked_users()) == [3, 4]
+
+
+def test_users_active_mid_cycle_are_still_checked_this_cycle(monkeypatch):
+    for user_id in (1, 2, 3, 4):
+        add_verified_user(user_id)
+    monkeypatch.setattr(sweeper, 'SWEEP_MAX_CALLS_PER_RUN', 2 * len(CHANNELS))
+    run_sweep(FakeBot({}))
+    database.update_last_active(3)
+    bot = FakeBot({3: 'left'})
+    run_sweep(bot)
+    assert sorted(bot.checked_users()) == [3, 4]
+    assert not is_verified(3)
+
+
+def test_sweep_does_nothing_without_required_channels(monkeypatch):
+    add_verified_user(1)
+    monkeypatch.setattr(sweeper, 'REQUIRED_CHANNELS', [])
+    bot = FakeBot({})
+    run_sweep(bot)
+    assert bot.calls == []
+    assert is_verified(1)
+
+
+def test_per_run_call_cap_is_respected(monkeypatch):
+    for user_id in range(1, 21):
+        add_verified_user(user_id)
+    monkeypatch.setattr(sweeper, 'SWEEP_MAX_CALLS_PER_RUN', 15)
+    bot = FakeBot({})
+    run_sweep(bot)
+    assert len(bot.calls) <= 15
+    assert sorted(bot.checked_users()) == list(range(1, 8))
+
+
+def test_failed_checks_never_revoke_and_are_retried_next_run():
+    for user_id in (1, 2, 3):
+        add_verified_user(user_id)
+    bot = FakeBot({2: 'left', 3: 'left'}, errors={2: Exception("network error")})
+    run_sweep(bot)
+    assert bot.checked_users().count(2) == 1
+    assert is_verified(2)
+    assert not is_verified(3)
+    # The checkpoint stops before the unknown user so the next run picks it up.
+    assert database.get_sweep_checkpoint()[:2] == ('idle', 1)
+    bot.errors = {}
+    run_sweep(bot)
+    assert not is_verified(2)
+
+
+def test_flood_wait_is_retried_within_the_batch():
+    for user_id in (1, 2):
+        add_verified_user(user_id)
+    bot = FakeBot({1: 'left'}, errors={1: [RetryAfter(0)]})
+    run_sweep(bot)
+    assert not is_verified(1)
+    assert database.get_sweep_checkpoint() == ('active', 0, None)
+
+
+def test_users_who_reverify_during_the_batch_keep_their_status():
+    add_verified_user(1)
+
+    class ReverifyingBot(FakeBot):
+        async def get_chat_member(self, chat_id, user_id):
+            # The user rejoins and presses Verify while the sweep's check is in flight.
+            database.mark_user_verified(user_id)
+            return await super().get_chat_member(chat_id, user_id)
+
+    run_sweep(ReverifyingBot({1: 'left'}))
+    assert is_verified(1)
+
+
+def test_user_failing_twice_is_skipped_so_the_sweep_moves_on():
+    for user_id in (1, 2, 3):
+        add_verified_user(user_id)
+    bot = FakeBot({3: 'left'}, errors={2: Exception("chat not found")})
+    bot_data = {}
+    run_sweep(bot, bot_data)
+    assert database.get_sweep_checkpoint()[:2] == ('idle', 1)
+    run_sweep(bot, bot_data)
+    assert is_verified(2)
+    assert not is_verified(3)
+    assert database.get_sweep_checkpoint() == ('active', 0, None)
+
+
+def test_persistent_flood_wait_never_skips_users():
+    for user_id in (1, 2):
+        add_verified_user(user_id)
+    bot = FakeBot({}, errors={1: [RetryAfter(0)] * 4})
+    bot_data = {}
+    run_sweep(bot, bot_data)
+    run_sweep(bot, bot_data)
+    assert database.get_sweep_checkpoint()[:2] == ('idle', 0)
+    assert is_verified(1)
+
+
+def test_outage_stops_the_run_without_moving_the_checkpoint():
+    for user_id in range(1, 21):
+        add_verified_user(user_id)
+    bot = FakeBot({}, errors={user_id: Exception("bad gateway") for user_id in range(1, 21)})
+    run_sweep(bot)
+    assert len(bot.calls) == sweeper.SWEEP_BATCH_SIZE
+    assert database.get_sweep_checkpoint()[:2] == ('idle', 0)
+    assert all(is_verified(user_id) for user_id in range(1, 21))